@@ -1,6 +1,6 @@
 import tabulate
 import sys
-from datetime import date
+from datetime import date, datetime
 from typing import Tuple
 import csv
 import os
@@ -10,10 +10,27 @@ import sqlite3
 # ----- DB functions, etc -----
 DB_PATH = Path("expenses.db")
 
+# single shared connection -- SQLite keeps its page cache per connection, so reopening
+# throws the cache away. Callers get the same instance back and must not close it.
+_CONN = None
+
 def get_conn(db_path=DB_PATH):
-    conn = sqlite3.connect(DB_PATH)
+    global _CONN
+    if _CONN is not None:
+        return _CONN
+    # roomy statement cache: every static SQL shape (see WHERE_VARIANTS) keeps its
+    # prepared statement alive instead of being re-parsed per call
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    # WAL + relaxed sync: commits no longer fsync the whole journal and readers
+    # don't block writers; the rest keeps hot pages and temp data in memory
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -64000")      # 64 MB page cache
+    conn.execute("PRAGMA mmap_size = 268435456")
+    _CONN = conn
     return conn
 
 def init_db(conn):
@@ -27,6 +44,13 @@ def init_db(conn):
                 date TEXT NOT NULL                  -- ISO date string
             )
         """)
+        # the date column is plain text in ISO form, so comparing it directly (no DATE() wrapper)
+        # lets these indexes serve the equality/range filters in list_expenses
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_cat_date ON expenses(category, date)")
+        # covering index for sum_expenses: category + date range + amount are all in the
+        # index B-tree, so the SUM never has to fetch rows from the main table
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_cat_date_amount ON expenses(category, date, amount)")
 
 def add_expense(conn, amount, category, desc, date):
     with conn:
@@ -36,105 +60,139 @@ def add_expense(conn, amount, category, desc, date):
         )
     return cur.lastrowid
 
-def list_expenses(conn, category, start, end, desc=None):
-    args, params = [], []
+# insert many expenses in one transaction -- one commit (and one fsync) for the whole
+# batch instead of one per row. Any batch import (e.g. CSV) must go through here.
+def add_expenses_bulk(conn, rows):
+    with conn:
+        conn.executemany(
+            "INSERT INTO expenses (amount, category, desc, date) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+# pre-built WHERE clause for every filter shape, keyed by (has_desc, date_mode, has_cat).
+# keeping the SQL text identical across calls lets sqlite3's statement cache reuse the
+# prepared statement instead of re-parsing and re-planning on every call
+def _build_where_variants():
+    variants = {}
+    for has_desc in (False, True):
+        for date_mode in (None, 'single', 'range'):
+            for has_cat in (False, True):
+                args = []
+                if has_desc:
+                    # callers pass the %-wrapped pattern themselves; ESCAPE keeps
+                    # literal % / _ in the user's text from acting as wildcards
+                    args.append("desc LIKE ? ESCAPE '\\'")
+                if date_mode == 'range':
+                    args.append("date BETWEEN ? AND ?")
+                elif date_mode == 'single':
+                    args.append("date = ?")
+                if has_cat:
+                    # plain equality, not LIKE: categories are exact names, and = lets
+                    # SQLite seek the (category, date) index directly
+                    args.append("category = ?")
+                variants[(has_desc, date_mode, has_cat)] = " WHERE " + " AND ".join(args) if args else ""
+    return variants
+
+WHERE_VARIANTS = _build_where_variants()
+
+# build the (where_sql, params) pair for the given filters by looking up the static variant
+def _filters(category, start, end, desc):
+    params = []
 
     if desc is not None:
-        args.append("desc LIKE ?")
         params.append(desc)
 
     if end is not None:
-        args.append("DATE(date) BETWEEN ? AND ?")
+        date_mode = 'range'
         params.append(start)
         params.append(end)
+    elif start is not None:
+        date_mode = 'single'
+        params.append(start)
     else:
-        if start is not None:
-            args.append("DATE(date) = ?")
-            params.append(start)
+        date_mode = None
 
     if category != 'all':
-        args.append("category LIKE ?")
         params.append(category)
 
-    sql = "SELECT id, amount, category, desc, date FROM expenses"
-    
-    if len(args) != 0:
-        sql += " WHERE "
-    
-    for arg in args:
-        sql += f"{arg} AND "
-    
-    if len(args) != 0:
-        sql = sql[:len(sql)-4]
+    where = WHERE_VARIANTS[(desc is not None, date_mode, category != 'all')]
+    return where, params
 
-    sql += " ORDER BY date DESC"
+def list_expenses(conn, category, start, end, desc=None):
+    where, params = _filters(category, start, end, desc)
+    sql = "SELECT id, amount, category, desc, date FROM expenses" + where + " ORDER BY date DESC"
+    # hand back the cursor itself -- callers iterate rows as SQLite produces them
+    # instead of materializing the whole result set up front
+    return conn.execute(sql, params)
 
-    return conn.execute(sql, params).fetchall()
+# total matching expenses summed inside SQLite, so only one scalar crosses into Python
+def sum_expenses(conn, category, start, end, desc=None):
+    where, params = _filters(category, start, end, desc)
+    sql = "SELECT COALESCE(SUM(amount), 0) FROM expenses" + where
+    return conn.execute(sql, params).fetchone()[0]
 
 # ----------
 
-# class for each expense  
+# class for each expense
 class Expense:
-    def __init__(self, amount: int, category: str | None = None, date: date | None = None, desc: str | None = None):
+    # slots keep each record at a fixed size instead of carrying a per-instance
+    # __dict__, which matters when bulk imports build one of these per row
+    __slots__ = ('amount', 'category', 'date', 'desc')
+
+    def __init__(self, amount: int, category: str | None = None, date: str | None = None, desc: str | None = None):
         self.amount = amount
         self.category = category
         self.date = date
         self.desc = desc
 
-# convert a string in the form 'MM/DD/YYYY' to 'YYYYMMDD' so that it can be stored as a datetime.date object
+# convert a string in the form 'MM/DD/YYYY' to a datetime.date object
 def convert_str_to_date(string: str) -> date:
     try:
-        arr = string.split('/')
-        if len(arr[0]) < 2:
-            arr[0] = f'0{arr[0]}'
-        if len(arr[1]) < 2:
-            arr[1] = f'0{arr[1]}'
-        return date.fromisoformat(f'{arr[2]}{arr[0]}{arr[1]}')
-    except IndexError:
+        return datetime.strptime(string, '%m/%d/%Y').date()
+    except ValueError:
         return None
 
 # convert date object to string of the form 'MM/DD/YYYY'
 def convert_date_to_string(date1: date) -> str:
-    arr = str(date1).split('-')
-    return f'{arr[1]}/{arr[2]}/{arr[0]}'
+    return date1.strftime('%m/%d/%Y')
 
-# parse a response given as a string in the format "category startdate enddate" where startdate can be 'all' and enddate can be blank
-def parse_response(response: str) -> Tuple[str, date | None, date | None]:
-    while True:
-        words = response.split(' ')
-        if len(words) > 3 or len(words) < 2:
-            print('Please try again. Your response must be in the format \"category startdate (enddate)\" or \"category all\". Type 4 to return to the main menu.')
-            words = input()
-            if words == '4':
-                return None
-            continue
-        category = words[0]
-        if words[1] != 'all':
-            start = convert_str_to_date(words[1])
-            if start == None:
-                print('Please enter a proper date in the format \"category startdate (enddate)\" or \"category all\". Type 4 to return to the main menu.')
-                words = input()
-                if words == '4':
-                    return None
-                continue
-        else:
-            start = None
-        if len(words) > 2:
-            end = convert_str_to_date(words[2])
-            if end == None:
-                print('Please enter a proper date in the format \"category startdate (enddate)\" or \"category all\". Type 4 to return to the main menu.')
-                words = input()
-                if words == '4':
-                    return None
-                continue
-        else:
-            end = None
-        break
-    
+# parse a single response given as a string in the format "category startdate enddate" where startdate can
+# be 'all' and enddate can be blank. Pure function with no I/O, so bulk/automated paths can call it too.
+# dates come back as ISO strings, matching the date TEXT column; returns None if the response is invalid
+def try_parse_response(response: str) -> Tuple[str, str | None, str | None] | None:
+    words = response.split(' ')
+    if len(words) > 3 or len(words) < 2:
+        return None
+    category = words[0]
+    if words[1] != 'all':
+        start = convert_str_to_date(words[1])
+        if start is None:
+            return None
+        start = start.isoformat()
+    else:
+        start = None
+    if len(words) > 2:
+        end = convert_str_to_date(words[2])
+        if end is None:
+            return None
+        end = end.isoformat()
+    else:
+        end = None
     return [category, start, end]
 
+# interactive driver: re-prompt until try_parse_response accepts the input, or None when the user types 4
+def parse_response(response: str) -> Tuple[str, str | None, str | None]:
+    while True:
+        args = try_parse_response(response)
+        if args is not None:
+            return args
+        print('Please try again. Your response must be in the format \"category startdate (enddate)\" or \"category all\", with dates as MM/DD/YYYY. Type 4 to return to the main menu.')
+        response = input()
+        if response == '4':
+            return None
+
 # read from the csv and filter according to category and date, then display the results
-def view_logged_expenses(category: str, start: date | None, end: date | None, conn):
+def view_logged_expenses(category: str, start: str | None, end: str | None, conn):
     headers = ['id', 'amount', 'category', 'date', 'desc']
     table = list_expenses(conn, category, start, end)
     print(tabulate.tabulate(table, headers=headers, tablefmt='github'))
@@ -143,22 +201,38 @@ def view_logged_expenses(category: str, start: date | None, end: date | None, co
 def log_expense(expense: Expense, conn):
     add_expense(conn, expense.amount, expense.category, expense.desc, expense.date)
 
+# read expenses from a csv of amount,category,date,desc rows and insert them as one batch
+def bulk_add_from_csv(path: str, conn):
+    rows = []
+    with open(path, newline='') as f:
+        for line in csv.reader(f):
+            if len(line) < 4:
+                print(f'Skipping row (need amount,category,date,desc): {line}')
+                continue
+            date1 = convert_str_to_date(line[2])
+            if date1 is None:
+                print(f'Skipping row with a bad date: {line}')
+                continue
+            try:
+                amount = float(line[0])
+            except ValueError:
+                print(f'Skipping row with a bad amount: {line}')
+                continue
+            rows.append((amount, line[1], line[3], date1.isoformat()))
+    add_expenses_bulk(conn, rows)
+    print(f'Added {len(rows)} expenses.')
+
 # calculate total spending or spending by category or by date and display result
-def summarize_spending(category: str, start: date | None, end: date | None, conn):
-    total = 0
-    headers = ['id', 'amount', 'category', 'date', 'desc']
-    rows = list_expenses(conn, category, start, end)
-    for row in rows:
-        row = dict(row)
-        total += row['amount']
+def summarize_spending(category: str, start: str | None, end: str | None, conn):
+    total = sum_expenses(conn, category, start, end)
 
     cat = f'the {category} category' if category != 'all' else 'all categories'
     if not start:
         daterange = ''
     elif not end:
-        daterange = f' on {convert_date_to_string(start)}'
+        daterange = f' on {convert_date_to_string(date.fromisoformat(start))}'
     else:
-        daterange = f' from {convert_date_to_string(start)} to {convert_date_to_string(end)}'
+        daterange = f' from {convert_date_to_string(date.fromisoformat(start))} to {convert_date_to_string(date.fromisoformat(end))}'
     print(f'The total for {cat}{daterange} is: {total}')
 
 # loop through main logic, with checking responses and returning to main menu or quit when 4 is typed
@@ -168,7 +242,7 @@ def main():
     num = 1
     while num != 4:
         try:
-            print("Would you like to (1) View logged expenses, (2) Log a new expense, (3) Summarize spending, or (4) quit? Please type the number that corresponds to the option. At any point, type 4 to return to this menu.")
+            print("Would you like to (1) View logged expenses, (2) Log a new expense, (3) Summarize spending, (4) quit, or (5) Bulk add expenses from a CSV file? Please type the number that corresponds to the option. At any point, type 4 to return to this menu.")
             num = int(input())
             if num == 4:
                 break
@@ -219,7 +293,7 @@ def main():
                 if desc == '4':
                     continue
 
-                expense = Expense(amount, category, dateInFormat, desc)
+                expense = Expense(amount, category, dateInFormat.isoformat(), desc)
                 log_expense(expense, conn)
             elif num == 3:
                 print("Please specify a category ('all' for all), then a date range ('all' for all, or enter one date for just that day). Example: food 8/20/2025 8/21/2025. Type 4 to return to main menu.")
@@ -232,6 +306,16 @@ def main():
                     continue
                 
                 summarize_spending(args[0], args[1], args[2], conn)
+            elif num == 5:
+                print("Path to the CSV file (rows of amount,category,date,desc). Type 4 to return to main menu.")
+                path = input()
+                if path == '4':
+                    continue
+
+                try:
+                    bulk_add_from_csv(path, conn)
+                except OSError:
+                    print('ERROR: Could not read that file')
             else:
                 print('ERROR: Please enter a valid number')
         except ValueError: